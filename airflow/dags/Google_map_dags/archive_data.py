@@ -0,0 +1,206 @@
+import os
+import re
+import json
+import argparse
+import datetime
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+from psycopg2.extras import execute_values
+
+from Google_map_dags.staging_db import get_db_connection, create_staging_table
+
+# Répertoire de l'archive Parquet, partitionnée par date de scraping puis par banque :
+# ~/input/archive_google_map/scraping_date=2025-03-13/bank=attijariwafa_bank/*.parquet
+ARCHIVE_DIR = os.path.expanduser("~/input/archive_google_map")
+
+# Colonnes de la table staging, dans l'ordre d'insertion
+STAGING_COLUMNS = ["bank_name", "branch_name", "location", "review_text", "rating", "review_date", "scraping_date"]
+
+# Schéma fixe de l'archive : tout en texte comme dans staging, pour que les partitions restent compatibles
+# même quand une colonne est entièrement nulle ou de type mixte dans un scraping
+ARCHIVE_SCHEMA = pa.schema([(column, pa.string()) for column in STAGING_COLUMNS + ["bank"]])
+PARTITIONING = ds.partitioning(
+    pa.schema([("scraping_date", pa.string()), ("bank", pa.string())]),
+    flavor="hive",
+)
+
+
+# Fonction pour obtenir un nom de partition stable à partir du nom de la banque
+def bank_slug(bank_name):
+    slug = re.sub(r"[^a-z0-9]+", "_", (bank_name or "inconnue").lower()).strip("_")
+    return slug or "inconnue"
+
+
+# Fonction d'aplatissement du JSON scrapé (banque -> agences -> avis) en une ligne par avis
+def flatten_reviews(data, scraping_date):
+    rows = []
+    for bank in data:
+        bank_name = bank.get("Bank_name", None)
+        for branch in bank.get("Branches", []):
+            branch_name = branch.get("branch_name", None)
+            location = branch.get("location", None)
+
+            for review in branch.get("reviews", []):
+                row = {
+                    "bank_name": bank_name,
+                    "branch_name": branch_name,
+                    "location": location,
+                    "review_text": review.get("review_text", None),
+                    "rating": review.get("review_rating", None),
+                    "review_date": review.get("review_date", None),
+                    "scraping_date": scraping_date.isoformat(),
+                    "bank": bank_slug(bank_name),
+                }
+                rows.append({key: None if value is None else str(value) for key, value in row.items()})
+    return pd.DataFrame(rows, columns=STAGING_COLUMNS + ["bank"], dtype=object)
+
+
+# Fonction d'archivage d'un fichier JSON scrapé en Parquet compressé (zstd)
+def archive_func(json_file, scraping_date=None):
+    scraping_date = scraping_date or datetime.date.today()
+
+    try:
+        with open(json_file, "r", encoding="utf-8") as file:
+            data = json.load(file)
+    except (OSError, json.JSONDecodeError) as e:
+        print(f"❌ Erreur de lecture du fichier à archiver : {e}")
+        return False
+
+    df = flatten_reviews(data, scraping_date)
+    if df.empty:
+        print("⚠️ Aucun avis à archiver.")
+        return False
+
+    try:
+        os.makedirs(ARCHIVE_DIR, exist_ok=True)
+        df.to_parquet(
+            ARCHIVE_DIR,
+            engine="pyarrow",
+            compression="zstd",
+            partition_cols=["scraping_date", "bank"],
+            index=False,
+            schema=ARCHIVE_SCHEMA,
+            # Un nouvel archivage du même couple date/banque remplace les fichiers existants
+            existing_data_behavior="delete_matching",
+        )
+    except Exception as e:
+        print(f"❌ Erreur lors de l'archivage Parquet : {e}")
+        return False
+
+    print(f"🗄️ {len(df)} avis archivés dans : {ARCHIVE_DIR}")
+    return True
+
+
+# Fonction de lecture de l'archive sur un intervalle de dates (bornes incluses)
+def read_archive(start_date, end_date, banks=None):
+    if not os.path.isdir(ARCHIVE_DIR):
+        print(f"❌ Archive introuvable : {ARCHIVE_DIR}")
+        return pd.DataFrame(columns=STAGING_COLUMNS)
+
+    # Les partitions scraping_date sont au format ISO : la comparaison de chaînes suffit
+    filters = [
+        ("scraping_date", ">=", str(start_date)),
+        ("scraping_date", "<=", str(end_date)),
+    ]
+    if banks:
+        filters.append(("bank", "in", [bank_slug(bank) for bank in banks]))
+
+    df = pd.read_parquet(
+        ARCHIVE_DIR,
+        engine="pyarrow",
+        columns=STAGING_COLUMNS,
+        filters=filters,
+        schema=ARCHIVE_SCHEMA,
+        partitioning=PARTITIONING,
+    )
+    df["scraping_date"] = pd.to_datetime(df["scraping_date"].astype(str)).dt.date
+    return df[STAGING_COLUMNS]
+
+
+# Fonction de rechargement de l'archive dans la table staging (remplace les couples date/banque rejoués)
+def replay_func(start_date, end_date, banks=None):
+    df = read_archive(start_date, end_date, banks)
+    if df.empty:
+        print("⚠️ Aucun avis archivé sur cet intervalle.")
+        return 0
+
+    conn = get_db_connection()
+    if not conn:
+        return 0
+
+    cursor = None
+    try:
+        cursor = conn.cursor()
+        create_staging_table(cursor)
+        # Suppression limitée aux couples (date, banque) présents dans l'archive pour rendre le rejeu
+        # idempotent sans perdre les données de staging qui n'ont jamais été archivées
+        pairs = df[["scraping_date", "bank_name"]].drop_duplicates()
+        partitions = list(pairs.astype(object).where(pairs.notna(), None).itertuples(index=False, name=None))
+        execute_values(
+            cursor,
+            """
+            DELETE FROM staging USING (VALUES %s) AS v(scraping_date, bank_name)
+            WHERE staging.scraping_date = v.scraping_date
+              AND staging.bank_name IS NOT DISTINCT FROM v.bank_name
+            """,
+            partitions,
+            template="(%s::date, %s::varchar)",
+            page_size=1000,
+        )
+
+        rows = list(df.astype(object).where(df.notna(), None).itertuples(index=False, name=None))
+        execute_values(
+            cursor,
+            f"INSERT INTO staging ({', '.join(STAGING_COLUMNS)}) VALUES %s",
+            rows,
+            page_size=1000,
+        )
+        conn.commit()
+        print(f"✅ {len(rows)} avis rejoués dans la table staging ({start_date} → {end_date}).")
+        return len(rows)
+
+    except Exception as e:
+        print(f"❌ Erreur lors du rejeu de l'archive : {e}")
+        conn.rollback()
+        return 0
+    finally:
+        if cursor:
+            cursor.close()
+        conn.close()
+
+
+# Point d'entrée pour Airflow : rejeu d'un intervalle passé en paramètres du DAG
+def replay(start_date, end_date, banks=None):
+    print(f"🚀 Début du rejeu de l'archive du {start_date} au {end_date}...")
+    count = replay_func(start_date, end_date, banks)
+    if not count:
+        raise ValueError("Aucun avis n'a été rejoué depuis l'archive.")
+    print("✅ Processus terminé.")
+
+
+# Fonction main pour exécuter le script en ligne de commande
+def main():
+    parser = argparse.ArgumentParser(description="Archive Parquet des avis Google Maps")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    archive_parser = subparsers.add_parser("archive", help="Archiver un fichier JSON scrapé")
+    archive_parser.add_argument("json_file")
+    archive_parser.add_argument("--date", type=datetime.date.fromisoformat, default=None,
+                                help="Date de scraping (AAAA-MM-JJ), aujourd'hui par défaut")
+
+    replay_parser = subparsers.add_parser("replay", help="Recharger un intervalle de dates dans staging")
+    replay_parser.add_argument("start_date", type=datetime.date.fromisoformat)
+    replay_parser.add_argument("end_date", type=datetime.date.fromisoformat)
+    replay_parser.add_argument("--bank", action="append", dest="banks", help="Limiter à une banque (répétable)")
+
+    args = parser.parse_args()
+    if args.command == "archive":
+        archive_func(os.path.expanduser(args.json_file), args.date)
+    else:
+        replay(args.start_date, args.end_date, args.banks)
+
+
+# Exécution du script uniquement si c'est le fichier principal
+if __name__ == "__main__":
+    main()
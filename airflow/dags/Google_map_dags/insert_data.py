@@ -1,26 +1,13 @@
-import psycopg2
 import os
 import json
 import glob
 import datetime
 from psycopg2 import sql
 
-# Fonction pour obtenir la connexion à la base de données
-def get_db_connection():
-    try:
-        conn = psycopg2.connect(
-            host="localhost",
-            port="5432",
-            user="airflow-redax",
-            password="airflow_pass",
-            dbname="google_map_db"
-        )
-        return conn
-    except Exception as e:
-        print(f"❌ Erreur lors de la connexion à la base de données : {e}")
-        return None
+from Google_map_dags.staging_db import get_db_connection, create_staging_table
+from Google_map_dags.archive_data import archive_func
 
-# Fonction d'insertion dans la table staging et renommage du fichier après succès
+# Fonction d'insertion dans la table staging et archivage Parquet du fichier après succès
 def insert_func():
     json_files = glob.glob(os.path.expanduser("~/input/data_of_json_google_map/Reviews_Of_Moroccan_Banks.json"))
     
@@ -34,20 +21,11 @@ def insert_func():
             return
         
         cursor = conn.cursor()
-        # DROP TABLE IF EXISTS staging;
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS staging (
-                bank_name VARCHAR(255),
-                branch_name VARCHAR(1000),
-                location VARCHAR(500),
-                review_text TEXT,
-                rating VARCHAR(255),
-                review_date VARCHAR(255),
-                scraping_date DATE
-            );
-        """)
+        create_staging_table(cursor)
         
         insertion_reussie = True  # Flag pour vérifier si l'insertion a réussi
+        # Date de scraping calculée une seule fois : partagée par staging et l'archive Parquet
+        scraping_date = datetime.date.today()
 
         for json_file in json_files:
             with open(json_file, "r", encoding="utf-8") as file:
@@ -72,10 +50,10 @@ def insert_func():
                             try:
                                 insert_query = sql.SQL("""
                                     INSERT INTO staging (bank_name, branch_name, location, review_text, rating, review_date, scraping_date)
-                                    VALUES (%s, %s, %s, %s, %s, %s, CURRENT_DATE);
+                                    VALUES (%s, %s, %s, %s, %s, %s, %s);
                                 """)
                                 cursor.execute(insert_query, (
-                                    bank_name, branch_name, location, review_text, review_rating, review_date
+                                    bank_name, branch_name, location, review_text, review_rating, review_date, scraping_date
                                 ))
                             except Exception as e:
                                 print(f"⚠️ Erreur lors de l'insertion d'une ligne : {e}")
@@ -86,15 +64,20 @@ def insert_func():
             conn.commit()
             print("✅ Insertion réussie dans la table staging.")
             
-            # Renommage du fichier après une insertion réussie
-            timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
-            new_filename = f"{os.path.splitext(json_file)[0]}_{timestamp}.json"
-            os.rename(json_file, new_filename)
-            print(f"📂 Fichier renommé en : {new_filename}")
+            # Archivage Parquet du fichier après une insertion réussie, puis suppression du JSON
+            if archive_func(json_file, scraping_date):
+                os.remove(json_file)
+                print(f"🗑️ Fichier JSON supprimé après archivage : {json_file}")
+            else:
+                # Renommage du fichier si l'archivage a échoué, pour ne pas perdre le scraping
+                timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
+                new_filename = f"{os.path.splitext(json_file)[0]}_{timestamp}.json"
+                os.rename(json_file, new_filename)
+                print(f"📂 Fichier renommé en : {new_filename}")
 
         else:
             conn.rollback()
-            print("❌ Insertion échouée, aucun fichier n'a été renommé.")
+            print("❌ Insertion échouée, aucun fichier n'a été archivé ni renommé.")
 
     except Exception as e:
         print(f"❌ Erreur lors de l'insertion des données : {e}")
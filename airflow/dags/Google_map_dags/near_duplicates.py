@@ -0,0 +1,201 @@
+"""
+Near-duplicate detection for Google Maps reviews using MinHash signatures and an LSH index
+"""
+import os
+import re
+import pickle
+import unicodedata
+import logging
+from datasketch import MinHash, MinHashLSH
+
+logging.basicConfig(level=logging.INFO)
+
+# Persisted index, reused across runs so that known clusters keep their id and cached inference
+INDEX_PATH = os.path.expanduser("~/input/near_duplicates_index.pkl")
+
+NUM_PERM = 128
+THRESHOLD = 0.85
+SHINGLE_SIZE = 3
+INDEX_FORMAT = 3
+
+# Texts whose negation tokens differ are never merged, e.g. "tres aimable" / "pas tres aimable"
+NEGATION_TOKENS = {
+    "pas", "ne", "n", "ni", "non", "jamais", "rien", "aucun", "aucune", "sans",
+    "not", "no", "never", "nothing", "t",
+}
+
+
+def normalize(text):
+    """Lowercase, strip accents and collapse punctuation/whitespace so that trivial variations share shingles"""
+    if not text or not isinstance(text, str):
+        return ""
+    text = unicodedata.normalize("NFKD", text.lower())
+    text = "".join(char for char in text if unicodedata.category(char) != "Mn")
+    text = re.sub(r"[^\w\s]", " ", text)
+    return re.sub(r"\s+", " ", text).strip()
+
+
+def negation_tokens(normalized):
+    """Return the negation tokens of a normalized text"""
+    return frozenset(normalized.split()) & NEGATION_TOKENS
+
+
+def minhash_signature(text, num_perm=NUM_PERM, shingle_size=SHINGLE_SIZE):
+    """
+    Compute the MinHash signature of a review text
+
+    Character shingles are used rather than words because most reviews are only a few words long.
+
+    Args:
+        text (str): Review text
+        num_perm (int): Number of permutations of the signature
+        shingle_size (int): Length of the character shingles
+
+    Returns:
+        MinHash: Signature of the normalized text
+    """
+    normalized = normalize(text)
+    signature = MinHash(num_perm=num_perm)
+    if len(normalized) <= shingle_size:
+        signature.update(normalized.encode("utf-8"))
+        return signature
+    for i in range(len(normalized) - shingle_size + 1):
+        signature.update(normalized[i:i + shingle_size].encode("utf-8"))
+    return signature
+
+
+class NearDuplicateIndex:
+    """
+    LSH index grouping near-identical review texts into clusters
+
+    Each cluster keeps the text of its representative (the first review seen) and the
+    inference results computed for it, so that language detection and sentiment analysis
+    run once per cluster, including across runs. Cached results are tagged with an inference
+    key (model name and version) and discarded when the key changes.
+    """
+
+    def __init__(self, threshold=THRESHOLD, num_perm=NUM_PERM, inference_key=None):
+        self.format = INDEX_FORMAT
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.inference_key = inference_key
+        self.lsh = MinHashLSH(threshold=threshold, num_perm=num_perm)
+        self.clusters = {}  # cluster_id -> {"text", "signature", "negations", "language", "sentiment"}
+        self.text_to_cluster = {}  # normalized text -> cluster_id, skips hashing of exact repeats
+
+    @classmethod
+    def load(cls, inference_key, path=INDEX_PATH, threshold=THRESHOLD, num_perm=NUM_PERM):
+        """
+        Load the persisted index, or start a new one if missing, unreadable or built with other parameters
+
+        Args:
+            inference_key (str): Identifier of the models used for inference (name and version)
+            path (str): Path of the persisted index
+            threshold (float): Minimum Jaccard similarity for two texts to share a cluster
+            num_perm (int): Number of permutations of the signatures
+
+        Returns:
+            NearDuplicateIndex: Index whose cached inference matches inference_key
+        """
+        if os.path.exists(path):
+            try:
+                with open(path, "rb") as file:
+                    index = pickle.load(file)
+                if (getattr(index, "format", None) == INDEX_FORMAT
+                        and index.threshold == threshold and index.num_perm == num_perm):
+                    logging.info(f"Loaded near-duplicate index with {len(index.clusters)} clusters")
+                    if index.inference_key != inference_key:
+                        index.reset_inference(inference_key)
+                    return index
+                logging.warning("Near-duplicate index format or parameters changed, rebuilding it")
+            except Exception as e:
+                logging.error(f"Near-duplicate index loading error: {e}")
+        return cls(threshold=threshold, num_perm=num_perm, inference_key=inference_key)
+
+    def reset_inference(self, inference_key):
+        """Discard the cached language and sentiment of every cluster, keeping clusters and ids"""
+        logging.warning(f"Inference key changed ({self.inference_key} -> {inference_key}), discarding cached results")
+        for cluster in self.clusters.values():
+            cluster["language"] = None
+            cluster["sentiment"] = None
+        self.inference_key = inference_key
+
+    def save(self, path=INDEX_PATH):
+        """Persist the index atomically"""
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "wb") as file:
+            pickle.dump(self, file)
+        os.replace(tmp_path, path)
+        logging.info(f"Saved near-duplicate index with {len(self.clusters)} clusters")
+
+    def assign(self, text):
+        """
+        Return the cluster id of a review text, creating a new cluster if no near-duplicate is indexed
+
+        Args:
+            text (str): Review text
+
+        Returns:
+            int: Cluster id or None for empty texts
+        """
+        normalized = normalize(text)
+        if not normalized:
+            return None
+        if normalized in self.text_to_cluster:
+            return self.text_to_cluster[normalized]
+
+        signature = minhash_signature(normalized, self.num_perm)
+        negations = negation_tokens(normalized)
+
+        # LSH candidates are only likely matches: check the estimated similarity against the
+        # representative and never merge texts with different negations
+        matches = []
+        for candidate in self.lsh.query(signature):
+            cluster = self.clusters[candidate]
+            similarity = signature.jaccard(cluster["signature"])
+            if similarity >= self.threshold and cluster["negations"] == negations:
+                matches.append((-similarity, candidate))
+
+        if matches:
+            cluster_id = min(matches)[1]
+        else:
+            cluster_id = len(self.clusters)
+            self.clusters[cluster_id] = {
+                "text": text,
+                "signature": signature,
+                "negations": negations,
+                "language": None,
+                "sentiment": None,
+            }
+            self.lsh.insert(cluster_id, signature)
+
+        self.text_to_cluster[normalized] = cluster_id
+        return cluster_id
+
+    def infer(self, cluster_id, detect_language, predict_sentiment):
+        """
+        Return (language, sentiment) of a cluster, running inference on its representative only once
+
+        Failed classifications are not cached, so that the next run tries again.
+
+        Args:
+            cluster_id (int): Cluster id returned by assign()
+            detect_language (callable): Language detection function
+            predict_sentiment (callable): Sentiment classification function returning None on failure
+
+        Returns:
+            tuple: (language, sentiment), sentiment being None if the classification failed
+        """
+        if cluster_id is None:
+            return None, None
+        cluster = self.clusters[cluster_id]
+        if cluster["sentiment"] is not None:
+            return cluster["language"], cluster["sentiment"]
+
+        language = detect_language(cluster["text"])
+        sentiment = predict_sentiment(cluster["text"])
+        if sentiment is not None:
+            cluster["language"] = language
+            cluster["sentiment"] = sentiment
+        return language, sentiment
@@ -3,6 +3,8 @@ import logging
 from transformers import pipeline
 
 logging.basicConfig(level=logging.INFO)
+MODEL_NAME = "nlptown/bert-base-multilingual-uncased-sentiment"
+FALLBACK_SENTIMENT = "Neutral"
 _pipeline = None
 
 def get_pipeline():
@@ -11,11 +13,12 @@ def get_pipeline():
         logging.info("Chargement du pipeline sentiment-analysis…")
         _pipeline = pipeline(
             "sentiment-analysis",
-            model="nlptown/bert-base-multilingual-uncased-sentiment"
+            model=MODEL_NAME
         )
     return _pipeline
 
-def classify_sentiment(text):
+def predict_sentiment(text):
+    """Retourne le sentiment, ou None si la classification a échoué (résultat à ne pas mettre en cache)"""
     pipe = get_pipeline()
     try:
         result = pipe(text)
@@ -27,7 +30,11 @@ def classify_sentiment(text):
         return "Neutral"
     except Exception as e:
         logging.error(f"Erreur classification sentiment : {e}")
-        return "Neutral"
+        return None
+
+def classify_sentiment(text):
+    sentiment = predict_sentiment(text)
+    return FALLBACK_SENTIMENT if sentiment is None else sentiment
 
 
 print(classify_sentiment('very good service'))
\ No newline at end of file
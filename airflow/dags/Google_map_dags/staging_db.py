@@ -0,0 +1,31 @@
+import psycopg2
+
+# Fonction pour obtenir la connexion à la base de données
+def get_db_connection():
+    try:
+        conn = psycopg2.connect(
+            host="localhost",
+            port="5432",
+            user="airflow-redax",
+            password="airflow_pass",
+            dbname="google_map_db"
+        )
+        return conn
+    except Exception as e:
+        print(f"❌ Erreur lors de la connexion à la base de données : {e}")
+        return None
+
+# Fonction de création de la table staging si elle n'existe pas
+def create_staging_table(cursor):
+    # DROP TABLE IF EXISTS staging;
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS staging (
+            bank_name VARCHAR(255),
+            branch_name VARCHAR(1000),
+            location VARCHAR(500),
+            review_text TEXT,
+            rating VARCHAR(255),
+            review_date VARCHAR(255),
+            scraping_date DATE
+        );
+    """)
@@ -1,5 +1,5 @@
 """
-Transform Phase 2: Sentiment Analysis and Language Detection for Google Maps Reviews
+Transform Phase 2: Near-Duplicate Grouping, Sentiment Analysis and Language Detection for Google Maps Reviews
 """
 import pandas as pd
 from sqlalchemy import create_engine
@@ -11,10 +11,14 @@ import gensim
 import logging
 
 # Import our custom sentiment module
-from Google_map_dags.sentiment_model import classify_sentiment
+from Google_map_dags.sentiment_model import predict_sentiment, MODEL_NAME, FALLBACK_SENTIMENT
+from Google_map_dags.near_duplicates import NearDuplicateIndex
 
 logging.basicConfig(level=logging.INFO)
 
+# Bump when detect_language or predict_sentiment change, to invalidate cached inference results
+INFERENCE_VERSION = 1
+
 # Make sure NLTK resources are downloaded
 try:
     nltk.data.find('tokenizers/punkt')
@@ -145,15 +149,37 @@ def main():
         if not column_exists(connection, 'cleaned_reviews', 'sentiment'):
             connection.execute("ALTER TABLE public.cleaned_reviews ADD COLUMN sentiment VARCHAR(50);")
             logging.info("Added 'sentiment' column.")
+
+        if not column_exists(connection, 'cleaned_reviews', 'near_dup_cluster_id'):
+            connection.execute("ALTER TABLE public.cleaned_reviews ADD COLUMN near_dup_cluster_id INTEGER;")
+            logging.info("Added 'near_dup_cluster_id' column.")
+
+        if not column_exists(connection, 'cleaned_reviews', 'is_near_duplicate'):
+            connection.execute("ALTER TABLE public.cleaned_reviews ADD COLUMN is_near_duplicate BOOLEAN;")
+            logging.info("Added 'is_near_duplicate' column.")
             
         # Fetch data from cleaned_reviews
         query = "SELECT bank_name, branch_name, location, review_text, rating, review_date FROM cleaned_reviews;"
         df = pd.read_sql(query, connection)
         logging.info(f"Fetched {len(df)} reviews from database")
 
-        # Apply language detection and sentiment analysis
-        df['language'] = df['review_text'].apply(detect_language)
-        df['sentiment'] = df['review_text'].apply(classify_sentiment)
+        # Group near-identical reviews so that inference runs once per cluster representative
+        near_dup_index = NearDuplicateIndex.load(inference_key=f"{MODEL_NAME}:{INFERENCE_VERSION}")
+        df['near_dup_cluster_id'] = df['review_text'].apply(near_dup_index.assign)
+        cluster_sizes = df['near_dup_cluster_id'].map(df['near_dup_cluster_id'].value_counts())
+        df['is_near_duplicate'] = cluster_sizes > 1
+        logging.info(f"Grouped {len(df)} reviews into {df['near_dup_cluster_id'].nunique()} near-duplicate clusters")
+
+        # Apply language detection and sentiment analysis on cluster representatives
+        inferred = {
+            cluster_id: near_dup_index.infer(cluster_id, detect_language, predict_sentiment)
+            for cluster_id in df['near_dup_cluster_id'].dropna().unique()
+        }
+        df['language'] = df['near_dup_cluster_id'].map(lambda cluster_id: inferred.get(cluster_id, (None, None))[0])
+        df['sentiment'] = df['near_dup_cluster_id'].map(lambda cluster_id: inferred.get(cluster_id, (None, None))[1])
+        # Failed classifications fall back to the default label for this run only (they are not cached)
+        df['sentiment'] = df['sentiment'].fillna(FALLBACK_SENTIMENT)
+        near_dup_index.save()
         logging.info("Applied language detection and sentiment analysis")
 
         # Langues supportées par le modèle
@@ -178,10 +204,11 @@ def main():
         for index, row in df_filtered.iterrows():
             update_query = """
             UPDATE cleaned_reviews
-                SET language = %s, sentiment = %s
+                SET language = %s, sentiment = %s, near_dup_cluster_id = %s, is_near_duplicate = %s
                 WHERE bank_name = %s AND branch_name = %s AND location = %s AND review_text = %s;
             """
-            connection.execute(update_query, (row['language'], row['sentiment'], 
+            connection.execute(update_query, (row['language'], row['sentiment'],
+                                              int(row['near_dup_cluster_id']), bool(row['is_near_duplicate']),
                                               row['bank_name'], row['branch_name'], 
                                               row['location'], row['review_text']))
             update_count += 1
@@ -190,7 +217,7 @@ def main():
             if update_count % 100 == 0:
                 logging.info(f"Updated {update_count}/{len(df_filtered)} reviews")
                 
-        logging.info(f"Updated sentiment and language for {update_count} reviews")
+        logging.info(f"Updated sentiment, language and near-duplicate clusters for {update_count} reviews")
 
         connection.close()
         logging.info("Transform phase 2 completed successfully")
@@ -7,6 +7,7 @@ from airflow.operators.bash import BashOperator
 from Google_map_dags.main_programme_of_scraping import main as scraping_methode
 from Google_map_dags.insert_data import main as insert_data
 from Google_map_dags.transform_phase_2 import main as transform_phase_2
+from Google_map_dags.archive_data import replay as replay_archive
 
 # Définition des arguments par défaut
 default_args = {
@@ -61,3 +62,49 @@ with DAG(
     )
 
     scraping_task >> insertion_task >> transform_phase_1_task >> transform_phase_2_task >> load_phase_task
+
+# DAG de rejeu : recharge un intervalle de dates depuis l'archive Parquet puis relance les transformations
+with DAG(
+    'Google_map_replay',
+    default_args=default_args,
+    description='Replay of archived Google Maps Reviews (Parquet) into PostgreSQL',
+    start_date=datetime(2025, 3, 13),
+    schedule_interval=None,
+    catchup=False,
+    params={
+        'start_date': '2025-03-13',
+        'end_date': '2025-03-13',
+    }
+) as replay_dag:
+
+    # Tâche 1 : Rechargement de l'archive dans la table staging
+    replay_task = PythonOperator(
+        task_id='replay_archive_task',
+        python_callable=replay_archive,
+        op_kwargs={
+            'start_date': '{{ params.start_date }}',
+            'end_date': '{{ params.end_date }}',
+        }
+    )
+
+    # Tâche 2 : Exécution de dbt pour transformer les données
+    replay_transform_phase_1_task = BashOperator(
+        task_id='transform_phase_1_task',
+        bash_command='source ~/dbt_venv/bin/activate && cd ~/my_projects_dbt/datawarehouse_project && dbt run --profiles-dir ~/.dbt --models cleaned_reviews',
+        dag=replay_dag
+    )
+
+    # Tache 3 : transformation phase 2
+    replay_transform_phase_2_task = PythonOperator(
+    task_id='transform_phase_2_task',
+    python_callable=transform_phase_2
+    )
+
+    # Tache 4 : Load Data into the Data mart
+    replay_load_phase_task=BashOperator(
+        task_id='load_phase_task',
+        bash_command='source ~/dbt_venv/bin/activate && cd ~/my_projects_dbt/datawarehouse_project && dbt run --profiles-dir ~/.dbt --models dim_bank dim_branch dim_location dim_sentiment fact_reviews',
+        dag=replay_dag
+    )
+
+    replay_task >> replay_transform_phase_1_task >> replay_transform_phase_2_task >> replay_load_phase_task
@@ -33,7 +33,9 @@ select
     r.review_text,
     r.rating,
     r.review_date,
-    r.language
+    r.language,
+    r.near_dup_cluster_id,  -- Cluster of near-identical review texts
+    r.is_near_duplicate
 from reviews r
 join banks b on r.bank_name = b.bank_name
 join branches br on r.branch_name = br.branch_name